@@ -1,6 +1,6 @@
 #!/usr/bin/env python3
 import re
-from typing import Dict, List, Tuple
+from typing import Dict, List, NamedTuple, Tuple
 import streamlit as st
 
 # ------------------ Prompt ------------------
@@ -12,160 +12,301 @@ PROMPT = (
 )
 
 # ------------------ Lexicons & Helpers ------------------
-POS_WORDS = {
-    # standard
-    "good","great","excellent","awesome","amazing","fantastic","love","like","liked","likes",
-    "enjoy","enjoyed","wonderful","perfect","nice","sweet","thanks","thank","appreciate",
-    "glad","happy","joy","thrilled","delighted","cool","wow",
-    # slang/short
-    "lit","fire","dope","goated","pog","based","legit","clutch","win","winning","w",
-    "sick","insane","crazy","ridiculous","wild",  # context-sensitive, handled below
-    "chef's","kiss","slaps","banger",
-    # emojis/shortcuts handled separately but keep for completeness
-}
-
-NEG_WORDS = {
-    # standard
-    "bad","awful","terrible","horrible","hate","hated","dislike","disliked","worse","worst",
-    "annoying","stupid","dumb","useless","broken","buggy","angry","mad","upset","sad",
-    "disappointed","disappointing","cringe","gross","sucks","sucked","sucky","lame","meh",
-    # slang
-    "trash","mid","cap","salty","ratio","cope","downbad","flake","flaky","weak","fail","l",
-    "wtf","smh","bs",
-}
-
-# words that *invert* polarity when nearby (and special idioms handled below)
-NEGATORS = {
-    "not","no","never","hardly","scarcely","barely","without","ain't","isn't","wasn't","don't",
-    "doesn't","didn't","can't","couldn't","won't","wouldn't","shouldn't","lack","lacking"
-}
-
-# intensifiers / diminishers
-INTENSIFIERS = {"very","really","so","super","totally","absolutely","insanely","crazy","hella","deadass","fr","for","real"}
-DIMINISHERS = {"kinda","kind","of","sorta","sort","of","slightly","somewhat","a","bit","lowkey"}
-
-# obvious positive emojis / neg emojis
-POS_EMOJI = {"🙂","😊","😄","😃","😁","😍","🥰","❤️","💖","🔥","✨","👍","👏","🙌","😁","😂","🤣","😎","✅","💯"}
-NEG_EMOJI = {"☹","🙁","😞","😠","😡","💔","👎","😢","😭","🤮","🤢","😤","😒","😓","😕","❌"}
-
-# context words that usually indicate a positive event
-POS_EVENT_WORDS = {
-    "bought","buy","got","gift","gifting","surprise","treat","treated",
-    "helped","promoted","passed","win","won","upgrade","raise","lunch","dinner","coffee"
-}
+# bits in Lexicons.word_tags
+NEGATOR_TAG, INTENSIFIER_TAG, DIMINISHER_TAG, CONTEXT_FLIP_TAG = 1, 2, 4, 8
+
+# combined modifier multiplier, indexed by negator<<2 | intensifier<<1 | diminisher
+MODIFIER_LUT: Tuple[float, ...] = tuple(
+    (-1 if n else 1) * (1.5 if i else 1) * (0.65 if d else 1)
+    for n in (0, 1) for i in (0, 1) for d in (0, 1)
+)
+
+class Lexicons(NamedTuple):
+    pos_words: frozenset
+    neg_words: frozenset
+    negators: frozenset
+    intensifiers: frozenset
+    diminishers: frozenset
+    context_flip_words: frozenset
+    pos_event_words: frozenset
+    sarcasm_prone_words: frozenset
+    pos_context_words: frozenset
+    pos_emoji: frozenset
+    neg_emoji: frozenset
+    word_polarity: Dict[str, float]
+    word_tags: Dict[str, int]
+    emoji_score: Dict[str, float]
+
+# Streamlit re-executes this script on every rerun; cache_resource builds the
+# lexicons and derived lookup tables once per server process instead.
+@st.cache_resource(show_spinner=False)
+def build_lexicons() -> Lexicons:
+    pos_words = frozenset({
+        # standard
+        "good","great","excellent","awesome","amazing","fantastic","love","like","liked","likes",
+        "enjoy","enjoyed","wonderful","perfect","nice","sweet","thanks","thank","appreciate",
+        "glad","happy","joy","thrilled","delighted","cool","wow",
+        # slang/short
+        "lit","fire","dope","goated","pog","based","legit","clutch","win","winning","w",
+        "sick","insane","crazy","ridiculous","wild",  # context-sensitive, handled below
+        "chef's","kiss","slaps","banger",
+        # emojis/shortcuts handled separately but keep for completeness
+    })
+
+    neg_words = frozenset({
+        # standard
+        "bad","awful","terrible","horrible","hate","hated","dislike","disliked","worse","worst",
+        "annoying","stupid","dumb","useless","broken","buggy","angry","mad","upset","sad",
+        "disappointed","disappointing","cringe","gross","sucks","sucked","sucky","lame","meh",
+        # slang
+        "trash","mid","cap","salty","ratio","cope","downbad","flake","flaky","weak","fail","l",
+        "wtf","smh","bs",
+    })
+
+    # words that *invert* polarity when nearby (and special idioms handled below)
+    negators = frozenset({
+        "not","no","never","hardly","scarcely","barely","without","ain't","isn't","wasn't","don't",
+        "doesn't","didn't","can't","couldn't","won't","wouldn't","shouldn't","lack","lacking"
+    })
+
+    # intensifiers / diminishers
+    # "kind of", "sort of" and "for real" are collapsed to one token by SCAN_RE
+    intensifiers = frozenset({"very","really","so","super","totally","absolutely","insanely","crazy","hella","deadass","fr","forreal"})
+    diminishers = frozenset({"kinda","kindof","sorta","sortof","slightly","somewhat","bit","lowkey","little"})
+
+    # slang that reads positive when followed by a positive event or an exclamation
+    context_flip_words = frozenset({"sick","crazy","insane","ridiculous","wild"})
+
+    # context words that usually indicate a positive event
+    pos_event_words = frozenset({
+        "bought","buy","got","gift","gifting","surprise","treat","treated",
+        "helped","promoted","passed","win","won","upgrade","raise","lunch","dinner","coffee"
+    })
+
+    # positive words that read as sarcasm when the statement trails off with "..."
+    sarcasm_prone_words = frozenset({"great","awesome","amazing","perfect","nice"})
+
+    # obvious positive emojis / neg emojis
+    pos_emoji = frozenset({"🙂","😊","😄","😃","😁","😍","🥰","❤️","💖","🔥","✨","👍","👏","🙌","😁","😂","🤣","😎","✅","💯"})
+    neg_emoji = frozenset({"☹","🙁","😞","😠","😡","💔","👎","😢","😭","🤮","🤢","😤","😒","😓","😕","❌"})
+
+    # word -> base polarity, so scoring needs a single lookup per token
+    word_polarity: Dict[str, float] = {w: 1.0 for w in pos_words}
+    word_polarity.update({w: -1.0 for w in neg_words})
+
+    # word -> bitmask of every modifier/context role it plays, so one lookup per token
+    # tells the scoring loop everything it needs about that word
+    word_tags: Dict[str, int] = {
+        w: (NEGATOR_TAG if w in negators else 0)
+        | (INTENSIFIER_TAG if w in intensifiers else 0)
+        | (DIMINISHER_TAG if w in diminishers else 0)
+        | (CONTEXT_FLIP_TAG if w in context_flip_words else 0)
+        for w in negators | intensifiers | diminishers | context_flip_words
+    }
+
+    # emoji -> score; each emoji is keyed both bare and with the U+FE0F variation
+    # selector so "❤️" and "❤" score the same
+    emoji_score: Dict[str, float] = {
+        variant: score
+        for emoji_set, score in ((pos_emoji, 0.6), (neg_emoji, -0.6))
+        for bare in (e.replace("\ufe0f", "") for e in emoji_set)
+        for variant in (bare, bare + "\ufe0f")
+    }
+
+    return Lexicons(
+        pos_words=pos_words,
+        neg_words=neg_words,
+        negators=negators,
+        intensifiers=intensifiers,
+        diminishers=diminishers,
+        context_flip_words=context_flip_words,
+        pos_event_words=pos_event_words,
+        sarcasm_prone_words=sarcasm_prone_words,
+        # words after "sick/crazy/..." that mark it as praise
+        pos_context_words=pos_event_words | pos_words,
+        pos_emoji=pos_emoji,
+        neg_emoji=neg_emoji,
+        word_polarity=word_polarity,
+        word_tags=word_tags,
+        emoji_score=emoji_score,
+    )
+
+LEXICONS = build_lexicons()
+POS_WORDS, NEG_WORDS = LEXICONS.pos_words, LEXICONS.neg_words
+NEGATORS, INTENSIFIERS, DIMINISHERS = LEXICONS.negators, LEXICONS.intensifiers, LEXICONS.diminishers
+CONTEXT_FLIP_WORDS, POS_EVENT_WORDS = LEXICONS.context_flip_words, LEXICONS.pos_event_words
+SARCASM_PRONE_WORDS, POS_CONTEXT_WORDS = LEXICONS.sarcasm_prone_words, LEXICONS.pos_context_words
+POS_EMOJI, NEG_EMOJI = LEXICONS.pos_emoji, LEXICONS.neg_emoji
+WORD_POLARITY, WORD_TAGS, EMOJI_SCORE = LEXICONS.word_polarity, LEXICONS.word_tags, LEXICONS.emoji_score
 
 WORD_RE = re.compile(r"[A-Za-z']+")
-ELLIPSIS_RE = re.compile(r"\.\.\.$|…$")
+# alternatives ordered by frequency; earlier branches already take letters, so
+# the catch-all only needs to exclude whitespace
+TOKEN_RE = re.compile(r"[A-Za-z']+|\.\.\.|[!?…]|[:;]-?\)|\S")
+EXCITED_RE = re.compile(r"(?:did you really|for real|no way|fr)\b")
+# one pass over the text: modifier phrases, words, exclamation marks, and
+# candidate emoji (a symbol plus an optional U+FE0F variation selector)
+SCAN_RE = re.compile(
+    r"(?P<phrase>(?:kind|sort)\s+of|for\s+real)\b|(?P<word>[A-Za-z']+)|(?P<bang>!)|(?P<emoji>[^\s\w]\ufe0f?)"
+)
 
 def tokenize(text: str) -> List[str]:
     # keep punctuation to check for exclamations and ellipses later
-    return re.findall(r"[A-Za-z']+|[!?…]|[:;]-?\)|\.\.\.|[^\sA-Za-z]", text)
+    return TOKEN_RE.findall(text)
 
 def is_emoji(tok: str) -> bool:
     return any(ch in POS_EMOJI or ch in NEG_EMOJI for ch in tok)
 
-def contains_any(s: str, vocab: set) -> bool:
-    return any(w in s for w in vocab)
-
 # ------------------ Core Heuristic Classifier ------------------
+class _Noop:
+    # stands in for the evidence lists when evidence isn't requested; appends are dropped
+    __slots__ = ()
+
+    def append(self, item) -> None:
+        pass
+
+_NOOP = _Noop()
+
+# No functools.lru_cache here: this file is Streamlit's main script and is
+# re-executed on every rerun, so a module-level cache is rebuilt each time and
+# never hits across interactions.
+# st.cache_data is no better: a hit (hash args, unpickle a copy) measured
+# ~40us against ~10-20us for classifying a sentence outright.
 def classify_sentiment(text: str, return_evidence: bool=False):
     """
     Returns 'positive', 'negative', or 'neutral'.
     Heuristics: lexicon + negation + intensifiers + emoji + slang/context rules.
     """
-    if not text or not text.strip():
-        return ("neutral", {"score":0.0}) if return_evidence else "neutral"
-
-    original = text
-    lowered = text.lower()
-    toks = tokenize(text)
-    words = [w.lower() for w in re.findall(r"[A-Za-z']+", lowered)]
+    original = text or ""
+    lowered = original.lower()
 
     score = 0.0
-    pos_hits, neg_hits, flipped_hits, intens_hits, dim_hits, emo_hits = [], [], [], [], [], []
+    emo_hits: List[str] = []  # also drives emoji scoring, so always collected
+    if return_evidence:
+        pos_hits, neg_hits, flipped_hits, intens_hits, dim_hits = [], [], [], [], []
+    else:
+        pos_hits = neg_hits = flipped_hits = intens_hits = dim_hits = _NOOP
+    sarcasm_prone = False  # a SARCASM_PRONE_WORDS word was scored positive
+
+    # --- single scan: collect words (modifier phrases as one token), count '!' and pick out emoji ---
+    words: List[str] = []
+    exclamations = 0
+    for m in SCAN_RE.finditer(lowered):
+        kind = m.lastgroup
+        if kind == "word":
+            words.append(m.group())
+        elif kind == "phrase":
+            words.append("".join(m.group().split()))
+        elif kind == "bang":
+            exclamations += 1
+        else:
+            emoji = m.group()
+            if emoji in EMOJI_SCORE:
+                emo_hits.append(emoji)
+
+    # --- no polarity word, emoji, '!' or "shut up" (incl. blank text): nothing can score ---
+    if (
+        not exclamations
+        and not emo_hits
+        and WORD_POLARITY.keys().isdisjoint(words)
+        and "shut up" not in lowered
+    ):
+        if return_evidence:
+            return "neutral", {
+                "score": 0.0,
+                "positive_hits": [],
+                "negative_hits": [],
+                "flipped_by_negation": [],
+                "intensified": [],
+                "diminished": [],
+                "emoji": [],
+            }
+        return "neutral"
 
     # --- Special idiom: "Shut up!" used as excited disbelief can be positive ---
     # Example: "Shut up! Did you really buy me lunch?"
     if "shut up" in lowered:
         after = lowered.split("shut up", 1)[1]
+        has_pos_event = not POS_EVENT_WORDS.isdisjoint(WORD_RE.findall(after))
         # look for excited disbelief + positive event soon after
-        if re.search(r"(did you really|for real|no way|fr)\b", after) and contains_any(after, POS_EVENT_WORDS):
+        if EXCITED_RE.search(after) and has_pos_event:
             score += 1.5
             pos_hits.append("shut up! (excited disbelief)")
         else:
             # if used alone with insult, treat mildly negative
-            if not contains_any(after, POS_EVENT_WORDS):
+            if not has_pos_event:
                 score -= 0.2
                 neg_hits.append("shut up (harsh)")
 
     # --- Token-level scoring with negation & modifiers in a small window ---
+    # rolling "last seen at" indices for modifiers among the words before w
     window = 3
+    last_neg = last_int = last_dim = -window - 1
+    prev_tags = 0
+    # bound lookups are local loads inside the loop instead of global + attribute loads
+    tags_of, polarity_of = WORD_TAGS.get, WORD_POLARITY.get
     for i, w in enumerate(words):
-        base = 0
-        w_is_pos = w in POS_WORDS
-        w_is_neg = w in NEG_WORDS
+        if prev_tags:
+            if prev_tags & NEGATOR_TAG:
+                last_neg = i - 1
+            if prev_tags & INTENSIFIER_TAG:
+                last_int = i - 1
+            if prev_tags & DIMINISHER_TAG:
+                last_dim = i - 1
+        tags = prev_tags = tags_of(w, 0)
+
+        base = polarity_of(w)
 
         # treat "sick/crazy/insane/ridiculous" as positive if followed by positive noun/event or exclamation
-        if w in {"sick","crazy","insane","ridiculous","wild"}:
-            lookahead = " ".join(words[i+1:i+6])
-            if contains_any(lookahead, POS_EVENT_WORDS|POS_WORDS) or "!" in original[i: i+80]:
-                w_is_pos, w_is_neg = True, False
-
-        if w_is_pos:
-            base = 1.0
-        elif w_is_neg:
-            base = -1.0
-        else:
-            continue
+        if tags & CONTEXT_FLIP_TAG:
+            if not POS_CONTEXT_WORDS.isdisjoint(words[i+1:i+6]) or "!" in original[i: i+80]:
+                base = 1.0
 
-        # check nearby negators
-        window_start = max(0, i - window)
-        window_slice = words[window_start:i]  # words before w
-        has_negator = any(t in NEGATORS for t in window_slice)
-        if has_negator:
-            base *= -1
-            flipped_hits.append(f"negated:{w}")
+        if base is None:
+            continue
 
-        # intensifiers/diminishers nearby
-        has_intens = any(t in INTENSIFIERS for t in window_slice)
-        has_dim = any(t in DIMINISHERS for t in window_slice)
+        # nearby negators / intensifiers / diminishers, applied as one multiplier
+        has_negator = i - last_neg <= window
+        has_intens = i - last_int <= window
+        has_dim = i - last_dim <= window
+        base *= MODIFIER_LUT[has_negator << 2 | has_intens << 1 | has_dim]
 
+        if has_negator and return_evidence:  # skip the f-string on the fast path
+            flipped_hits.append(f"negated:{w}")
         if has_intens:
-            base *= 1.5
             intens_hits.append(w)
         if has_dim:
-            base *= 0.65
             dim_hits.append(w)
 
         score += base
+        if base > 0 and w in SARCASM_PRONE_WORDS:
+            sarcasm_prone = True
         (pos_hits if base > 0 else neg_hits).append(w)
 
     # --- emojis ---
-    for ch in original:
-        if ch in POS_EMOJI:
-            score += 0.6
-            emo_hits.append(ch)
-        elif ch in NEG_EMOJI:
-            score -= 0.6
-            emo_hits.append(ch)
+    for emoji in emo_hits:
+        score += EMOJI_SCORE[emoji]
 
     # --- exclamation boosts (cap at 3) ---
-    exclamations = original.count("!")
     if exclamations:
         score += min(exclamations, 3) * 0.2
 
     # --- ellipsis after a positive word can imply sarcasm → dampen positive ---
-    if ELLIPSIS_RE.search(original.strip()):
-        if any(w in pos_hits for w in ("great","awesome","amazing","perfect","nice")):
-            score -= 0.4
+    if sarcasm_prone and original.rstrip().endswith(("...", "…")):
+        score -= 0.4
 
     # --- common polarity flips: "not bad" (positive), "not good" (negative) ---
-    if re.search(r"\bnot\s+bad\b", lowered):
-        score += 1.0
-        pos_hits.append("not bad")
-    if re.search(r"\bnot\s+(so\s+)?good\b", lowered):
-        score -= 1.0
-        neg_hits.append("not good")
+    # matched on word tokens, so "not bad" and "not, bad" both count
+    if "not" in lowered:
+        bigrams = set(zip(words, words[1:]))
+        if ("not", "bad") in bigrams:
+            score += 1.0
+            pos_hits.append("not bad")
+        if ("not", "good") in bigrams or (
+            ("not", "so") in bigrams and ("not", "so", "good") in zip(words, words[1:], words[2:])
+        ):
+            score -= 1.0
+            neg_hits.append("not good")
 
     # --- Label from score with small neutral band ---
     label = "neutral"
@@ -186,6 +327,15 @@ def classify_sentiment(text: str, return_evidence: bool=False):
         }
     return label
 
+def classify_batch(texts: List[str]) -> List[str]:
+    """
+    Labels each text independently, e.g. one per line of an uploaded file.
+    Lexicons and compiled patterns are shared across the whole batch. Lines go
+    straight to the plain classifier; don't route them through a per-text
+    cache, whose hashing/pickling costs more than classifying a line.
+    """
+    return [classify_sentiment(t) for t in texts]
+
 # ------------------ Streamlit UI ------------------
 DEFAULT_TEXT = "Shut up! Did you really buy me lunch?"
 
@@ -219,3 +369,10 @@ if st.button("Classify", type="primary", use_container_width=True):
     if show_evidence:
         with st.expander("Evidence & scoring"):
             st.write(evidence)
+
+    # uploaded files usually hold one statement per line; label those too
+    if uploaded is not None:
+        lines = [line for line in text.splitlines() if line.strip()]
+        if len(lines) > 1:
+            st.subheader("Per-line labels")
+            st.dataframe({"line": lines, "label": classify_batch(lines)}, use_container_width=True)